@@ -0,0 +1,132 @@
+"""Async views of the most read endpoints, used in ASGI mode.
+
+Views return the same data as their DRF counterparts,
+other methods of the same urls are passed to DRF views."""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from recipes.models import Ingredient, Recipe, Tag
+from .cache import (aget_versions, get_ingredient_suggestions,
+                    get_recipe_version_names, get_versions_etag)
+from .serializers import (IngredientSerializer, RecipeReadSerializer,
+                          TagSerializer)
+from .utils import get_recipes_for_read
+from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+
+recipe_view = RecipeViewSet.as_view(
+    {"get": "retrieve", "patch": "partial_update", "delete": "destroy"}
+)
+tag_list_view = TagViewSet.as_view({"get": "list"})
+ingredient_list_view = IngredientViewSet.as_view({"get": "list"})
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data, status=status, safe=False,
+        json_dumps_params={"ensure_ascii": False, "separators": (",", ":")}
+    )
+
+
+async def versioned_response(request, names, get_data):
+    """Return response with data from get_data() coroutine,
+    or 304 response if client has data of the current versions."""
+    versions = await aget_versions(*names)
+    etag = quote_etag(get_versions_etag(request, names, versions))
+    last_modified = int(max(versions))
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        try:
+            response = json_response(await get_data())
+        except Http404 as error:
+            return json_response({"detail": str(error)}, status=404)
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+async def authenticate(request):
+    """Set request.user by token, as TokenAuthentication of DRF views.
+    Return 401 response if the token is invalid, None otherwise.
+    Session user set by middleware is not used by API and is loaded lazily
+    with sync query, so it is replaced before view accesses it."""
+    try:
+        user_auth = await sync_to_async(
+            TokenAuthentication().authenticate
+        )(request)
+    except AuthenticationFailed as error:
+        response = json_response({"detail": str(error.detail)}, status=401)
+        response.headers["WWW-Authenticate"] = "Token"
+        return response
+    request.user = user_auth[0] if user_auth else AnonymousUser()
+    return None
+
+
+async def tag_list(request):
+    if request.method != "GET" or request.GET:
+        return await sync_to_async(tag_list_view)(request)
+    error_response = await authenticate(request)
+    if error_response:
+        return error_response
+
+    async def get_data():
+        return TagSerializer(
+            [tag async for tag in Tag.objects.all()], many=True
+        ).data
+
+    return await versioned_response(request, ["tags"], get_data)
+
+
+async def ingredient_list(request):
+    name = request.GET.get("name", "").strip().lower()
+    if request.method != "GET" or set(request.GET) - {"name"}:
+        return await sync_to_async(ingredient_list_view)(request)
+    error_response = await authenticate(request)
+    if error_response:
+        return error_response
+
+    async def get_data():
+        if name:
+            return await sync_to_async(get_ingredient_suggestions)(name)
+        return IngredientSerializer(
+            [ingredient async for ingredient in Ingredient.objects.all()],
+            many=True
+        ).data
+
+    return await versioned_response(request, ["ingredients"], get_data)
+
+
+async def recipe_detail(request, pk):
+    if request.method != "GET" or request.GET:
+        return await sync_to_async(recipe_view)(request, pk=pk)
+    error_response = await authenticate(request)
+    if error_response:
+        return error_response
+
+    async def get_data():
+        recipe = await get_recipes_for_read(
+            Recipe.objects.filter(pk=pk), request.user
+        ).afirst()
+        if recipe is None:
+            raise Http404("No Recipe matches the given query.")
+        return RecipeReadSerializer(
+            recipe, context={"request": request}
+        ).data
+
+    response = await versioned_response(
+        request, get_recipe_version_names(request, pk), get_data
+    )
+    patch_vary_headers(response, ("Authorization",))
+    return response
+
+
+# DRF views are exempt from CSRF check, so are async views passing to them.
+# csrf_exempt decorator of Django 4.2 does not keep views async.
+for view in (tag_list, ingredient_list, recipe_detail):
+    view.csrf_exempt = True
@@ -0,0 +1,179 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from io import SEEK_END, BytesIO
+from time import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.views.decorators.http import condition
+
+from recipes.models import Ingredient, RecipeIngredient, Tag
+from .constants import (INGREDIENT_SEARCH_CACHE_TIMEOUT,
+                        RECIPE_LIST_CACHE_TIMEOUT, SHOPPING_LIST_CACHE_TIMEOUT,
+                        SHOPPING_LIST_FILE_CACHE_MAX_SIZE,
+                        TAG_IDS_CACHE_TIMEOUT)
+from .serializers import IngredientSerializer
+from .utils import SHOPPING_LIST_EXPORTERS, search_ingredients
+
+
+def get_versions(*names) -> list:
+    """Return versions of data with given names.
+    Version is the time of the last change of the data."""
+    keys = [f'version:{name}' for name in names]
+    versions = cache.get_many(keys)
+    missing = {key: time() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*names):
+    """Set versions of data with given names to the current time.
+    Done after the transaction is committed, so the new versions
+    are never paired with the old data."""
+    def bump():
+        now = time()
+        cache.set_many({f'version:{name}': now for name in names}, None)
+    transaction.on_commit(bump)
+
+
+async def aget_versions(*names) -> list:
+    keys = [f'version:{name}' for name in names]
+    versions = await cache.aget_many(keys)
+    missing = {key: time() for key in keys if key not in versions}
+    if missing:
+        await cache.aset_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def get_versions_etag(request, names, versions) -> str:
+    return hashlib.md5(repr(
+        (request.get_full_path(), names, versions)
+    ).encode()).hexdigest()
+
+
+def versioned_condition(get_version_names):
+    """Decorator making view handle conditional GET requests.
+    ETag and Last-Modified are built from versions of data
+    with names returned by get_version_names(request, **kwargs)."""
+
+    def get_etag(request, *args, **kwargs):
+        names = get_version_names(request, **kwargs)
+        return get_versions_etag(request, names, get_versions(*names))
+
+    def get_last_modified(request, *args, **kwargs):
+        names = get_version_names(request, **kwargs)
+        return datetime.fromtimestamp(
+            max(get_versions(*names)), tz=timezone.utc
+        )
+
+    return condition(etag_func=get_etag, last_modified_func=get_last_modified)
+
+
+def get_recipe_version_names(request, pk, **kwargs) -> list:
+    """Names of data shown in recipe detail for the request user."""
+    names = ['tags', 'ingredients', 'users', f'recipe:{pk}']
+    if request.user.is_authenticated:
+        names.append(f'user:{request.user.id}')
+    return names
+
+
+def get_recipe_list_key(request) -> str:
+    """Key of recipe list page for anonymous users,
+    built from request query parameters and versions of listed data."""
+    params = sorted(
+        (name, sorted(request.query_params.getlist(name)))
+        for name in request.query_params
+    )
+    names = ['recipes', 'tags', 'ingredients', 'users']
+    digest = hashlib.md5(repr(
+        (request.get_host(), params, get_versions(*names))
+    ).encode()).hexdigest()
+    return f'recipe_list:{digest}'
+
+
+def get_cached_recipe_list(request, get_data):
+    """Return recipe list page data from cache,
+    calling get_data() to build it on cache miss."""
+    key = get_recipe_list_key(request)
+    data = cache.get(key)
+    if data is None:
+        data = get_data()
+        cache.set(key, data, RECIPE_LIST_CACHE_TIMEOUT)
+    return data
+
+
+def get_tag_ids() -> dict:
+    """Return tag ids by slugs, cached until tags are changed."""
+    key = f'tag_ids:{get_versions("tags")[0]}'
+    tag_ids = cache.get(key)
+    if tag_ids is None:
+        tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(key, tag_ids, TAG_IDS_CACHE_TIMEOUT)
+    return tag_ids
+
+
+def get_ingredient_suggestions(name: str) -> list:
+    """Return serialized ingredients found by name.
+    Results are cached until ingredients are changed."""
+    key = 'ingredient_suggestions:{}:{}'.format(
+        get_versions('ingredients')[0],
+        hashlib.md5(name.encode()).hexdigest()
+    )
+    suggestions = cache.get(key)
+    if suggestions is None:
+        ingredients = search_ingredients(Ingredient.objects.all(), name)
+        suggestions = IngredientSerializer(ingredients, many=True).data
+        cache.set(key, suggestions, INGREDIENT_SEARCH_CACHE_TIMEOUT)
+    return suggestions
+
+
+def get_shopping_list_key(user_id) -> str:
+    return f'shopping_list:{user_id}'
+
+
+def get_shopping_list(user) -> list:
+    """Return ingredients amounts summed over recipes in user shopping cart.
+    Result is cached until the cart or recipes in it are changed."""
+    key = get_shopping_list_key(user.id)
+    shopping_list = cache.get(key)
+    if shopping_list is None:
+        shopping_list = list(
+            RecipeIngredient.objects.filter(
+                recipe__is_in_shopping_cart__user=user
+            )
+            .values('ingredient__name', 'ingredient__measurement_unit')
+            .annotate(Sum('amount'))
+            .order_by('ingredient__name', 'ingredient__measurement_unit')
+        )
+        cache.set(key, shopping_list, SHOPPING_LIST_CACHE_TIMEOUT)
+    return shopping_list
+
+
+def invalidate_shopping_lists(user_ids):
+    keys = [get_shopping_list_key(id) for id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_shopping_list_file(shopping_list: list, file_format: str):
+    """Return file with shopping list in requested format.
+    Files are cached by format and hash of the list content,
+    so identical lists are rendered once."""
+    digest = hashlib.sha256(json.dumps(
+        shopping_list, ensure_ascii=False, sort_keys=True
+    ).encode()).hexdigest()
+    key = f'shopping_list_file:{file_format}:{digest}'
+    content = cache.get(key)
+    if content is not None:
+        return BytesIO(content)
+    file = SHOPPING_LIST_EXPORTERS[file_format](shopping_list)
+    if file.seek(0, SEEK_END) <= SHOPPING_LIST_FILE_CACHE_MAX_SIZE:
+        file.seek(0)
+        cache.set(key, file.read(), SHOPPING_LIST_CACHE_TIMEOUT)
+    file.seek(0)
+    return file
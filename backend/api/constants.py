@@ -4,3 +4,28 @@ NEW_LINE_OFFSET = 25
 PAGE_X_SIZE = 595
 PAGE_Y_SIZE = 840
 PAGE_LEFT_MARGIN = 60
+PAGE_BOTTOM_MARGIN = 50
+FONT_NAME = 'OpenSans'
+FONT_FILE_NAME = 'OpenSans-Regular.ttf'
+FILE_SPOOL_MAX_SIZE = 1024 * 1024
+IMAGE_MAX_SIZE = 10 * 1024 * 1024
+# Multiple of 4, so every chunk of base64 string is decoded alone.
+BASE64_DECODE_CHUNK_SIZE = 64 * 1024
+SHOPPING_LIST_HEADER = 'Список покупок:'
+SHOPPING_LIST_CSV_HEADER = ('name', 'measurement_unit', 'amount')
+SHOPPING_LIST_DEFAULT_FORMAT = 'pdf'
+SHOPPING_LIST_CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'txt': 'text/plain; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json',
+}
+SHOPPING_LIST_CACHE_TIMEOUT = 60 * 60 * 24
+SHOPPING_LIST_FILE_CACHE_MAX_SIZE = 512 * 1024
+INGREDIENT_SEARCH_LIMIT = 50
+AVAILABLE_INGREDIENTS_LIMIT = 100
+INGREDIENT_SEARCH_CACHE_TIMEOUT = 60 * 60 * 24
+RECIPE_LIST_CACHE_TIMEOUT = 60 * 15
+TAG_IDS_CACHE_TIMEOUT = 60 * 60 * 24
+PAGINATION_QUERY_PARAM = 'pagination'
+CURSOR_PAGINATION = 'cursor'
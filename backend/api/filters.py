@@ -1,27 +1,66 @@
-from django.db.models import Q
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Exists, F, OuterRef, Q
 from django_filters.rest_framework import (BooleanFilter, CharFilter,
-                                           FilterSet,
-                                           ModelMultipleChoiceFilter)
+                                           FilterSet, MultipleChoiceFilter,
+                                           OrderingFilter)
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.constants import SEARCH_CONFIG
+from recipes.models import Ingredient, Recipe, RecipeTag
+from .cache import get_tag_ids
+from .utils import search_ingredients
 
 
 class IngredientFilter(FilterSet):
-    name = CharFilter(field_name='name', lookup_expr='istartswith')
+    name = CharFilter(method='filter_name')
 
     class Meta:
         model = Ingredient
         fields = ['name', ]
 
+    def filter_name(self, queryset, name, value):
+        return search_ingredients(queryset, value)
+
+
+class RecipeOrderingFilter(OrderingFilter):
+    """Ordering by given fields, with id for recipes with equal values."""
+
+    def filter(self, qs, value):
+        qs = super().filter(qs, value)
+        if value:
+            qs = qs.order_by(*qs.query.order_by, 'id')
+        return qs
+
+
+class TagSlugFilter(MultipleChoiceFilter):
+    """Recipes with any of the tags given by slugs.
+    Slugs are resolved to ids with cached map and recipes are checked
+    with EXISTS subquery, so recipes are not duplicated by joins
+    and no DISTINCT is needed."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault(
+            'choices', lambda: [(slug, slug) for slug in get_tag_ids()]
+        )
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        tag_ids = get_tag_ids()
+        return qs.filter(Exists(RecipeTag.objects.filter(
+            recipe=OuterRef('pk'),
+            tag_id__in=[tag_ids[slug] for slug in value if slug in tag_ids]
+        )))
+
 
 class RecipeFilter(FilterSet):
-    tags = ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        queryset=Tag.objects.all(),
-        to_field_name='slug'
-    )
+    tags = TagSlugFilter()
     is_favorited = BooleanFilter(method='filter_for_boolean')
     is_in_shopping_cart = BooleanFilter(method='filter_for_boolean')
+    # Declared before ordering, so explicit ordering overrides the rank.
+    search = CharFilter(method='filter_search')
+    ordering = RecipeOrderingFilter(fields=('favorites_count', 'pub_date'))
 
     class Meta:
         model = Recipe
@@ -39,3 +78,20 @@ class RecipeFilter(FilterSet):
             filter = ~Q(**{lookup: current_user})
 
         return queryset.filter(filter)
+
+    def filter_search(self, queryset, name, value):
+        """Recipes matching search query, most relevant first.
+        Name matches weigh more than text and ingredient ones.
+        Substring search is used where full-text search is not available."""
+        if connection.vendor != 'postgresql':
+            return queryset.filter(
+                Q(name__icontains=value)
+                | Q(text__icontains=value)
+                | Q(ingredients__name__icontains=value)
+            ).distinct()
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank', *Recipe._meta.ordering)
@@ -3,6 +3,8 @@ from rest_framework.exceptions import ParseError
 from rest_framework.mixins import CreateModelMixin, DestroyModelMixin
 from rest_framework.viewsets import GenericViewSet
 
+from .constants import CURSOR_PAGINATION, PAGINATION_QUERY_PARAM
+
 
 class UserRelatedModelMixin(
         CreateModelMixin, DestroyModelMixin, GenericViewSet):
@@ -30,3 +32,21 @@ class UserRelatedModelMixin(
 
     def perform_create(self, serializer):
         serializer.save(**self.filter_parameters)
+
+
+class CursorPaginationMixin:
+    """Use cursor pagination instead of the default one for listed actions,
+    if requested with `pagination=cursor` query parameter."""
+    cursor_pagination_class = None
+    cursor_pagination_actions = ('list',)
+
+    @property
+    def paginator(self):
+        if (
+            not hasattr(self, '_paginator')
+            and self.action in self.cursor_pagination_actions
+            and self.request.query_params.get(
+                PAGINATION_QUERY_PARAM) == CURSOR_PAGINATION
+        ):
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
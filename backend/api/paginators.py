@@ -1,5 +1,32 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import CursorPagination as BaseCursorPagination
 from rest_framework.pagination import PageNumberPagination as BasePagination
 
 
 class PageNumberPagination(BasePagination):
     page_size_query_param = 'limit'
+
+
+class RecipeCursorPagination(BaseCursorPagination):
+    page_size_query_param = 'limit'
+    ordering = ('-pub_date', 'id')
+    # Cursor keeps position in the ordering above only,
+    # so other orderings and search rank can not be paginated with it.
+    unsupported_query_params = ('ordering', 'search')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = [
+            param for param in self.unsupported_query_params
+            if param in request.query_params
+        ]
+        if params:
+            raise ParseError(
+                'Параметры {} не поддерживаются с курсорной '
+                'пагинацией.'.format(', '.join(params))
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+
+class UserCursorPagination(BaseCursorPagination):
+    page_size_query_param = 'limit'
+    ordering = ('id',)
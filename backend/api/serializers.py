@@ -1,27 +1,88 @@
 import base64
+import binascii
+import json
 
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.http import QueryDict
 from djoser.serializers import UserSerializer
 from rest_framework import serializers
 
 from recipes.constants import MIN_IGNREDIENT_AMOUNT
+from recipes.images import get_image_variant
 from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
                             RecipeIngredient, ShoppingCart, Tag)
 from shortlink.models import ShortLink
 from users.models import Subscription
+from .constants import BASE64_DECODE_CHUNK_SIZE, IMAGE_MAX_SIZE
+from .utils import get_recipe_ingredients_prefetch, get_recipes_limit
 
 User = get_user_model()
 
 
+class Base64UploadedFile(TemporaryUploadedFile):
+    """Decoded image file. Closed when deleted, as Django closes uploaded
+    files after request, because storage may move it away."""
+
+    def __del__(self):
+        self.close()
+
+
 class Base64ImageField(serializers.ImageField):
+    default_error_messages = {
+        'max_size': 'Размер изображения не должен превышать {max_size} МБ.'
+    }
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='image.' + ext)
+            data = self.decode(data)
+        elif getattr(data, 'size', 0) > IMAGE_MAX_SIZE:
+            # File uploaded with multipart form.
+            self.fail('max_size', max_size=IMAGE_MAX_SIZE // 1024 // 1024)
         return super().to_internal_value(data)
 
+    def decode(self, data):
+        """Decode base64 image by chunks to temporary file on disk,
+        checking its size before decoding."""
+        try:
+            format, imgstr = data.split(';base64,')
+        except ValueError:
+            self.fail('invalid_image')
+        # Line breaks of wrapped base64 would shift chunk boundaries
+        # off multiples of 4 characters.
+        imgstr = ''.join(imgstr.split())
+        if len(imgstr) // 4 * 3 > IMAGE_MAX_SIZE:
+            self.fail('max_size', max_size=IMAGE_MAX_SIZE // 1024 // 1024)
+        ext = format.split('/')[-1]
+        file = Base64UploadedFile(
+            'image.' + ext, format.split(':')[-1], 0, None
+        )
+        try:
+            for start in range(0, len(imgstr), BASE64_DECODE_CHUNK_SIZE):
+                file.write(base64.b64decode(
+                    imgstr[start:start + BASE64_DECODE_CHUNK_SIZE]
+                ))
+        except binascii.Error:
+            file.close()
+            self.fail('invalid_image')
+        file.size = file.tell()
+        file.seek(0)
+        return file
+
+
+class ImageVariantField(serializers.ImageField):
+    """URL of resized variant of image,
+    or of the image itself while the variant is not made."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return get_image_variant(instance, self.source)
+
 
 class AvatarSerializer(serializers.ModelSerializer):
     avatar = Base64ImageField()
@@ -33,15 +94,18 @@ class AvatarSerializer(serializers.ModelSerializer):
 
 class UserReadSerializer(UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    avatar_thumbnail = ImageVariantField()
 
     class Meta:
         model = User
         fields = (
             'email', 'id', 'username', 'first_name',
-            'last_name', 'avatar', 'is_subscribed'
+            'last_name', 'avatar', 'avatar_thumbnail', 'is_subscribed'
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         current_user = self.context['request'].user
         return (
             current_user.is_authenticated
@@ -62,14 +126,10 @@ class TagSerializer(serializers.ModelSerializer):
 
 
 class RecipeIngredientReadSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        source='ingredient_id', read_only=True
-    )
-    name = serializers.SlugRelatedField(
-        slug_field='name', source='ingredient', read_only=True
-    )
-    measurement_unit = serializers.SlugRelatedField(
-        slug_field='measurement_unit', source='ingredient', read_only=True
+    id = serializers.IntegerField(source='ingredient_id', read_only=True)
+    name = serializers.CharField(source='ingredient.name', read_only=True)
+    measurement_unit = serializers.CharField(
+        source='ingredient.measurement_unit', read_only=True
     )
 
     class Meta:
@@ -85,12 +145,16 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     )
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_thumbnail = ImageVariantField()
+    image_medium = ImageVariantField()
 
     class Meta:
         model = Recipe
-        exclude = ('pub_date',)
+        exclude = ('pub_date', 'favorites_count', 'search_vector')
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'favorited'):
+            return obj.favorited
         user = self.context['request'].user
         return (
             user.is_authenticated
@@ -98,6 +162,8 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         )
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'in_cart'):
+            return obj.in_cart
         user = self.context['request'].user
         return (
             user.is_authenticated
@@ -105,8 +171,14 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         )
 
 
+class RecipeMatchSerializer(RecipeReadSerializer):
+    """Recipe with count of its ingredients the user has."""
+    matched_ingredients = serializers.IntegerField(read_only=True)
+    total_ingredients = serializers.IntegerField(read_only=True)
+
+
 class RecipeIngredientCreateSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField()
     amount = serializers.IntegerField(min_value=MIN_IGNREDIENT_AMOUNT)
 
     class Meta:
@@ -124,7 +196,37 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
         read_only_fields = ('author', )
-        exclude = ('pub_date', )
+        exclude = (
+            'pub_date', 'favorites_count', 'image_thumbnail', 'image_medium',
+            'search_vector'
+        )
+
+    def to_internal_value(self, data):
+        if isinstance(data, QueryDict):
+            data = self.parse_form_data(data)
+        return super().to_internal_value(data)
+
+    def parse_form_data(self, data):
+        """Return multipart form data in the shape of JSON request data.
+        Ingredients are sent as JSON list,
+        tags as repeated fields or JSON list."""
+        parsed = data.dict()
+        if 'tags' in data:
+            parsed['tags'] = data.getlist('tags')
+            if len(parsed['tags']) == 1 and parsed['tags'][0].startswith('['):
+                parsed['tags'] = self.load_json('tags', parsed['tags'][0])
+        if 'ingredients' in data:
+            parsed['ingredients'] = self.load_json(
+                'ingredients', data['ingredients']
+            )
+        return parsed
+
+    @staticmethod
+    def load_json(name, value):
+        try:
+            return json.loads(value)
+        except ValueError:
+            raise serializers.ValidationError({name: ['Некорректный JSON.']})
 
     def get_fields(self):
         fields = super().get_fields()
@@ -134,17 +236,38 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         return fields
 
     def to_representation(self, instance):
+        prefetch_related_objects(
+            [instance], 'tags', get_recipe_ingredients_prefetch()
+        )
         return RecipeReadSerializer(instance, context=self.context).data
 
     def set_related_objects(self, instance, tags, ingredients):
         instance.tags.set(tags)
-        instance.ingredients.clear()
-        for ingredient in ingredients:
-            instance.ingredients.add(
-                ingredient['id'],
-                through_defaults={'amount': ingredient['amount']}
-            )
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        existing = RecipeIngredient.objects.filter(recipe=instance)
+        to_update = []
+        to_delete = []
+        for row in existing:
+            amount = amounts.pop(row.ingredient_id, None)
+            if amount is None:
+                to_delete.append(row.id)
+            elif amount != row.amount:
+                row.amount = amount
+                to_update.append(row)
+        if to_delete:
+            RecipeIngredient.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            RecipeIngredient.objects.bulk_update(to_update, ['amount'])
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=instance, ingredient_id=ingredient_id, amount=amount
+            ) for ingredient_id, amount in amounts.items()
+        )
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
@@ -152,6 +275,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         self.set_related_objects(recipe, tags, ingredients)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
@@ -176,6 +300,16 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         if len(ingredients_id) != len(set(ingredients_id)):
             message = 'В рецепте не могут повторяться ингредиенты.'
             raise serializers.ValidationError(message)
+        missing_id = set(ingredients_id) - set(
+            Ingredient.objects.filter(
+                id__in=ingredients_id
+            ).values_list('id', flat=True)
+        )
+        if missing_id:
+            message = 'Ингредиенты с id {} не существуют.'.format(
+                ', '.join(str(id) for id in sorted(missing_id))
+            )
+            raise serializers.ValidationError(message)
         return values
 
 
@@ -189,9 +323,11 @@ class ShortLinkSerializer(serializers.ModelSerializer):
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
+    image_thumbnail = ImageVariantField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_thumbnail', 'cooking_time')
 
 
 class UserRecipeBaseSerializer(serializers.ModelSerializer):
@@ -243,25 +379,21 @@ class SubscriptionSerializer(serializers.ModelSerializer):
 
 class SubscriptionReadSerializer(UserReadSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = (
             'email', 'id', 'username', 'first_name', 'last_name',
-            'is_subscribed', 'recipes', 'recipes_count', 'avatar'
+            'is_subscribed', 'recipes', 'recipes_count', 'avatar',
+            'avatar_thumbnail'
         )
 
     def get_recipes(self, obj):
-        recipes_limit = self.context['request'].query_params.get(
-            'recipes_limit', None)
-        if recipes_limit:
-            try:
-                recipes_limit = int(recipes_limit)
-            except ValueError:
-                recipes_limit = None
-        queryset = Recipe.objects.filter(author=obj)[:recipes_limit]
-        return ShortRecipeSerializer(queryset, many=True).data
-
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
+        if hasattr(obj, 'recipes_preview'):
+            # Already limited by `recipes_limit` while prefetching.
+            recipes = obj.recipes_preview
+        else:
+            recipes = obj.recipes.all()[
+                :get_recipes_limit(self.context['request'])
+            ]
+        return ShortRecipeSerializer(recipes, many=True).data
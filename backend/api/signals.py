@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
+                            RecipeIngredient, RecipeTag, ShoppingCart, Tag)
+from users.models import Subscription
+from .cache import bump_versions, invalidate_shopping_lists
+
+User = get_user_model()
+
+
+def get_cart_owners(**recipe_filter):
+    return ShoppingCart.objects.filter(
+        **recipe_filter
+    ).values_list('user_id', flat=True)
+
+
+@receiver([post_save, post_delete], sender=ShoppingCart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    invalidate_shopping_lists([instance.user_id])
+
+
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    invalidate_shopping_lists(get_cart_owners(recipe_id=instance.recipe_id))
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_changed(sender, instance, created, **kwargs):
+    # Ingredients of the recipe may be changed with bulk operations,
+    # which do not send signals, before the recipe itself is saved.
+    if not created:
+        invalidate_shopping_lists(get_cart_owners(recipe_id=instance.id))
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_shopping_lists(
+            get_cart_owners(recipe__ingredients=instance).distinct()
+        )
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def bump_tags_version(sender, **kwargs):
+    bump_versions('tags')
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def bump_ingredients_version(sender, **kwargs):
+    bump_versions('ingredients')
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def bump_recipe_version(sender, instance, **kwargs):
+    bump_versions('recipes', f'recipe:{instance.id}')
+
+
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+@receiver([post_save, post_delete], sender=RecipeTag)
+def bump_recipe_version_by_related(sender, instance, **kwargs):
+    bump_versions('recipes', f'recipe:{instance.recipe_id}')
+
+
+@receiver([post_save, post_delete], sender=User)
+def bump_users_version(sender, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        bump_versions('users')
+
+
+@receiver([post_save, post_delete], sender=FavoriteRecipe)
+@receiver([post_save, post_delete], sender=ShoppingCart)
+@receiver([post_save, post_delete], sender=Subscription)
+def bump_user_version(sender, instance, **kwargs):
+    bump_versions(f'user:{instance.user_id}')
@@ -0,0 +1,168 @@
+import base64
+import os
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
+                            RecipeIngredient, RecipeTag, ShoppingCart, Tag)
+from users.models import Subscription
+from .constants import BASE64_DECODE_CHUNK_SIZE
+from .serializers import Base64ImageField
+
+User = get_user_model()
+
+RECIPES_COUNT = 10
+
+
+class RecipeListQueriesTest(TestCase):
+    """Recipe list page costs a fixed number of queries,
+    whatever the page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Автор', last_name='Рецептов', password='password'
+        )
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Читатель', last_name='Рецептов', password='password'
+        )
+        tags = Tag.objects.bulk_create(
+            Tag(name=f'Тег {i}', slug=f'tag{i}') for i in range(2)
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {i}', measurement_unit='г')
+            for i in range(2)
+        )
+        for i in range(RECIPES_COUNT):
+            recipe = Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {i}', text='Описание',
+                cooking_time=10, image='recipes/images/recipe.png'
+            )
+            recipe.tags.set(tags)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=1
+                ) for ingredient in ingredients
+            )
+            FavoriteRecipe.objects.create(user=cls.user, recipe=recipe)
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        Subscription.objects.create(user=cls.user, subscribing=cls.author)
+
+    def setUp(self):
+        # Anonymous list pages are cached.
+        cache.clear()
+        self.client = APIClient()
+
+    def assert_list_queries(self, num):
+        for limit in (1, RECIPES_COUNT):
+            with self.subTest(limit=limit), self.assertNumQueries(num):
+                response = self.client.get(
+                    '/api/recipes/', {'limit': limit}
+                )
+                self.assertEqual(len(response.data['results']), limit)
+            cache.clear()
+
+    def test_anonymous_list_queries(self):
+        self.assert_list_queries(4)
+
+    def test_authenticated_list_queries(self):
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assert_list_queries(6)
+        response = self.client.get('/api/recipes/')
+        recipe = response.data['results'][0]
+        self.assertTrue(recipe['is_favorited'])
+        self.assertTrue(recipe['is_in_shopping_cart'])
+        self.assertTrue(recipe['author']['is_subscribed'])
+
+
+class RecipeTagFilterTest(TestCase):
+    """Tag filter returns every recipe once, without joins and DISTINCT."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Читатель', last_name='Рецептов', password='password'
+        )
+        cls.tags = Tag.objects.bulk_create(
+            Tag(name=f'Тег {i}', slug=f'tag{i}') for i in range(3)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author=cls.user, name=f'Рецепт {i}', text='Описание',
+                cooking_time=10, image='recipes/images/recipe.png'
+            ) for i in range(RECIPES_COUNT)
+        )
+        # Every recipe but the last one has all tags.
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag=tag)
+            for recipe in recipes[:-1] for tag in cls.tags
+        )
+        cls.tagged_ids = {recipe.id for recipe in recipes[:-1]}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def get_recipes(self, *slugs):
+        return self.client.get(
+            '/api/recipes/', {'tags': slugs, 'limit': RECIPES_COUNT}
+        )
+
+    def test_no_duplicates(self):
+        response = self.get_recipes(*(tag.slug for tag in self.tags))
+        ids = [recipe['id'] for recipe in response.data['results']]
+        self.assertEqual(response.data['count'], len(self.tagged_ids))
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), self.tagged_ids)
+
+    def test_bounded_queries(self):
+        self.get_recipes(self.tags[0].slug)
+        # Tag ids are cached, so filtered list costs as much as unfiltered.
+        with CaptureQueriesContext(connection) as context:
+            self.get_recipes(*(tag.slug for tag in self.tags))
+        self.assertEqual(len(context), 6)
+        recipes_sql = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT "recipes_recipe"')
+        ]
+        self.assertEqual(len(recipes_sql), 1)
+        self.assertIn('EXISTS', recipes_sql[0])
+        self.assertNotIn('DISTINCT', recipes_sql[0])
+        self.assertNotIn('JOIN', recipes_sql[0])
+
+    def test_unknown_slug(self):
+        response = self.get_recipes('unknown')
+        self.assertEqual(response.status_code, 400)
+
+
+class Base64ImageFieldTest(TestCase):
+    """Base64 images are decoded by chunks, whatever the line wrapping."""
+
+    def setUp(self):
+        image = Image.frombytes('RGB', (200, 200), os.urandom(200 * 200 * 3))
+        content = BytesIO()
+        image.save(content, 'PNG')
+        self.content = content.getvalue()
+
+    def test_wrapped_payload(self):
+        encoded = base64.encodebytes(self.content).decode()
+        self.assertGreater(len(encoded), BASE64_DECODE_CHUNK_SIZE * 2)
+        file = Base64ImageField().to_internal_value(
+            f'data:image/png;base64,{encoded}'
+        )
+        file.seek(0)
+        self.assertEqual(file.read(), self.content)
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from . import async_views
 from .views import (FavoriteRecipeViewSet, IngredientViewSet, RecipeViewSet,
                     ShoppingCartViewSet, SubscriptionViewSet, TagViewSet,
                     UsersViewSet)
@@ -17,7 +19,13 @@ favorite_recipe_view = FavoriteRecipeViewSet.as_view(actions)
 shopping_cart_view = ShoppingCartViewSet.as_view(actions)
 subscription_view = SubscriptionViewSet.as_view(actions)
 
-urlpatterns = [
+async_urlpatterns = [
+    path('tags/', async_views.tag_list),
+    path('ingredients/', async_views.ingredient_list),
+    path('recipes/<int:pk>/', async_views.recipe_detail),
+]
+
+urlpatterns = (async_urlpatterns if settings.ASYNC_VIEWS else []) + [
     path('', include(router_v1.urls)),
     path('auth/', include('djoser.urls.authtoken')),
     path(
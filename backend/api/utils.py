@@ -1,77 +1,239 @@
-from io import BytesIO
+import csv
+import json
+from io import TextIOWrapper
+from tempfile import SpooledTemporaryFile
 
 from django.conf import settings
-from django.db.models import QuerySet
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Exists, OuterRef, Prefetch, Value, When
 from django.urls import reverse
 from django.utils.crypto import get_random_string
+from rest_framework.exceptions import ParseError
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
 
-from shortlink.constants import SHORT_LINK_LENGTH
+from recipes.models import FavoriteRecipe, RecipeIngredient, ShoppingCart
+from shortlink.constants import SHORT_LINK_CREATE_ATTEMPTS, SHORT_LINK_LENGTH
 from shortlink.models import ShortLink
-from .constants import (HEADER_FONT_SIZE, LINE_FONT_SIZE, NEW_LINE_OFFSET,
-                        PAGE_LEFT_MARGIN, PAGE_X_SIZE, PAGE_Y_SIZE)
+from users.models import Subscription
+from .constants import (AVAILABLE_INGREDIENTS_LIMIT, FONT_FILE_NAME,
+                        FONT_NAME, HEADER_FONT_SIZE, INGREDIENT_SEARCH_LIMIT,
+                        LINE_FONT_SIZE, NEW_LINE_OFFSET, PAGE_BOTTOM_MARGIN,
+                        PAGE_LEFT_MARGIN, PAGE_X_SIZE, PAGE_Y_SIZE,
+                        FILE_SPOOL_MAX_SIZE, SHOPPING_LIST_CSV_HEADER,
+                        SHOPPING_LIST_HEADER)
 
+User = get_user_model()
 
-def create_short_link(request, pk):
-    """Create short link for recipr in request,
-    create and return new ShortLink instanse with the short link."""
-    while True:
-        slug = get_random_string(length=SHORT_LINK_LENGTH)
-        if not ShortLink.objects.filter(short_link_slug=slug).exists():
-            break
 
-    short_link_url = request.build_absolute_uri(reverse(
-        'short_link_redirect',
-        kwargs={'slug': slug}
-    ))
+def get_recipe_ingredients_prefetch() -> Prefetch:
+    """Return Prefetch of recipe ingredients rows joined
+    with their Ingredient, so they are loaded in one query."""
+    return Prefetch(
+        'recipeingredient_set',
+        queryset=RecipeIngredient.objects.select_related('ingredient')
+    )
+
+
+def get_recipes_for_read(queryset, user):
+    """Return recipes with all data needed by RecipeReadSerializer,
+    so a page of recipes costs a fixed number of queries."""
+    queryset = queryset.prefetch_related(
+        'tags', get_recipe_ingredients_prefetch()
+    )
+    if not user.is_authenticated:
+        return queryset.select_related('author')
+    authors = User.objects.annotate(
+        is_subscribed=Exists(Subscription.objects.filter(
+            user=user, subscribing=OuterRef('pk')
+        ))
+    )
+    return queryset.prefetch_related(
+        Prefetch('author', queryset=authors)
+    ).annotate(
+        favorited=Exists(FavoriteRecipe.objects.filter(
+            user=user, recipe=OuterRef('pk')
+        )),
+        in_cart=Exists(ShoppingCart.objects.filter(
+            user=user, recipe=OuterRef('pk')
+        )),
+    )
+
+
+def search_ingredients(queryset, name):
+    """Ingredients containing name, ones starting with it go first."""
+    return queryset.filter(name__icontains=name).annotate(
+        is_substring_match=Case(
+            When(name__istartswith=name, then=Value(False)),
+            default=Value(True)
+        )
+    ).order_by('is_substring_match', 'name', 'id')[:INGREDIENT_SEARCH_LIMIT]
+
+
+def get_recipes_limit(request):
+    """Return `recipes_limit` query parameter as int,
+    or None if it is not set or invalid."""
+    try:
+        recipes_limit = int(request.query_params['recipes_limit'])
+    except (KeyError, ValueError):
+        return None
+    return recipes_limit if recipes_limit >= 0 else None
+
+
+def get_ingredient_ids(request) -> list:
+    """Return ids from `ingredients` query parameter,
+    repeated or given as comma separated list."""
+    values = [
+        value for param in request.query_params.getlist('ingredients')
+        for value in param.split(',') if value.strip()
+    ]
+    try:
+        ids = {int(value) for value in values}
+    except ValueError:
+        raise ParseError('Идентификаторы ингредиентов должны быть числами.')
+    if not ids:
+        raise ParseError('Укажите ингредиенты.')
+    if len(ids) > AVAILABLE_INGREDIENTS_LIMIT:
+        raise ParseError(
+            f'Можно указать не более {AVAILABLE_INGREDIENTS_LIMIT} '
+            'ингредиентов.'
+        )
+    return sorted(ids)
+
+
+def create_short_link(request, pk):
+    """Return ShortLink for recipe in request.
+    Existing link for the recipe is reused, new one is created
+    with random slug, relying on UNIQUE constraints of ShortLink fields."""
     redirect_url = (request
-                    .build_absolute_uri()
+                    .build_absolute_uri(request.path)
                     .replace('api/', '')
                     .replace('get-link/', ''))
+    for _ in range(SHORT_LINK_CREATE_ATTEMPTS):
+        short_link = ShortLink.objects.filter(
+            redirect_url=redirect_url).first()
+        if short_link:
+            return short_link
+        slug = get_random_string(length=SHORT_LINK_LENGTH)
+        short_link_url = request.build_absolute_uri(reverse(
+            'short_link_redirect',
+            kwargs={'slug': slug}
+        ))
+        try:
+            with transaction.atomic():
+                return ShortLink.objects.create(
+                    short_link_slug=slug,
+                    redirect_url=redirect_url,
+                    short_link_url=short_link_url
+                )
+        except IntegrityError:
+            # Slug is taken or link is created by concurrent request.
+            pass
+    raise IntegrityError(f'Can not create short link for {redirect_url}.')
 
-    new_short_link = ShortLink(
-        short_link_slug=slug,
-        redirect_url=redirect_url,
-        short_link_url=short_link_url
-    )
-    new_short_link.save()
-    return new_short_link
 
+def register_fonts():
+    """Register fonts used in pdf documents.
+    Called once on app startup."""
+    pdfmetrics.registerFont(TTFont(
+        FONT_NAME,
+        settings.FONTS_DIR / FONT_FILE_NAME
+    ))
 
-def print_list_to_pdf(data: list, list_header) -> BytesIO:
-    """Returns BinaryI/O object with pdf page of data
+
+def print_list_to_pdf(data: list, list_header) -> SpooledTemporaryFile:
+    """Returns temporary file with pdf document of data
     printed in a list line by line with list header on the top.
+    New page is started when the current one is full.
     """
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=(PAGE_X_SIZE, PAGE_Y_SIZE))
-    pdfmetrics.registerFont(TTFont(
-        'OpenSans',
-        settings.FONTS_DIR / 'OpenSans-Regular.ttf'
-    ))
-    p.setFont('OpenSans', HEADER_FONT_SIZE)
+    file = SpooledTemporaryFile(max_size=FILE_SPOOL_MAX_SIZE)
+    p = canvas.Canvas(file, pagesize=(PAGE_X_SIZE, PAGE_Y_SIZE))
+    p.setFont(FONT_NAME, HEADER_FONT_SIZE)
     p.drawCentredString(
         PAGE_X_SIZE / 2,
         PAGE_Y_SIZE - NEW_LINE_OFFSET * 2,
         list_header)
-    p.setFont('OpenSans', LINE_FONT_SIZE)
+    p.setFont(FONT_NAME, LINE_FONT_SIZE)
+    y_position = PAGE_Y_SIZE - NEW_LINE_OFFSET * 3
     for count, row in enumerate(data):
-        line = f'{count + 1}. {row}'
-        y_position = PAGE_Y_SIZE - (3 + count) * NEW_LINE_OFFSET
-        p.drawString(PAGE_LEFT_MARGIN, y_position, line)
+        if y_position < PAGE_BOTTOM_MARGIN:
+            p.showPage()
+            p.setFont(FONT_NAME, LINE_FONT_SIZE)
+            y_position = PAGE_Y_SIZE - NEW_LINE_OFFSET * 2
+        p.drawString(PAGE_LEFT_MARGIN, y_position, f'{count + 1}. {row}')
+        y_position -= NEW_LINE_OFFSET
     p.showPage()
     p.save()
-    buffer.seek(0)
-    return buffer
+    file.seek(0)
+    return file
 
 
-def get_pdf_shopping_list(ingredients: QuerySet) -> BytesIO:
-    shoping_list = [
+def get_shopping_list_lines(ingredients: list) -> list:
+    return [
         '{} - {} ({})'.format(
             ingredient['ingredient__name'],
             ingredient['amount__sum'],
             ingredient['ingredient__measurement_unit']
         ) for ingredient in ingredients
     ]
-    return print_list_to_pdf(shoping_list, 'Список покупок:')
+
+
+def get_pdf_shopping_list(ingredients: list) -> SpooledTemporaryFile:
+    return print_list_to_pdf(
+        get_shopping_list_lines(ingredients), SHOPPING_LIST_HEADER)
+
+
+def get_txt_shopping_list(ingredients: list) -> SpooledTemporaryFile:
+    file = SpooledTemporaryFile(max_size=FILE_SPOOL_MAX_SIZE)
+    text = TextIOWrapper(file, encoding='utf-8')
+    text.write(f'{SHOPPING_LIST_HEADER}\n')
+    for count, line in enumerate(get_shopping_list_lines(ingredients)):
+        text.write(f'{count + 1}. {line}\n')
+    text.flush()
+    text.detach()
+    file.seek(0)
+    return file
+
+
+def get_csv_shopping_list(ingredients: list) -> SpooledTemporaryFile:
+    file = SpooledTemporaryFile(max_size=FILE_SPOOL_MAX_SIZE)
+    text = TextIOWrapper(file, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    writer.writerow(SHOPPING_LIST_CSV_HEADER)
+    writer.writerows(
+        (
+            ingredient['ingredient__name'],
+            ingredient['ingredient__measurement_unit'],
+            ingredient['amount__sum']
+        ) for ingredient in ingredients
+    )
+    text.flush()
+    text.detach()
+    file.seek(0)
+    return file
+
+
+def get_json_shopping_list(ingredients: list) -> SpooledTemporaryFile:
+    file = SpooledTemporaryFile(max_size=FILE_SPOOL_MAX_SIZE)
+    file.write(json.dumps(
+        [
+            {
+                'name': ingredient['ingredient__name'],
+                'measurement_unit': ingredient['ingredient__measurement_unit'],
+                'amount': ingredient['amount__sum']
+            } for ingredient in ingredients
+        ],
+        ensure_ascii=False
+    ).encode())
+    file.seek(0)
+    return file
+
+
+SHOPPING_LIST_EXPORTERS = {
+    'pdf': get_pdf_shopping_list,
+    'txt': get_txt_shopping_list,
+    'csv': get_csv_shopping_list,
+    'json': get_json_shopping_list,
+}
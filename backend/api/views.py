@@ -1,11 +1,15 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
+from django.db.models import Count, F, FloatField, Prefetch, Q, Value
+from django.db.models.functions import Cast
 from django.http import FileResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.vary import vary_on_headers
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.permissions import CurrentUserOrAdmin
 from djoser.views import UserViewSet as BaseUserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.permissions import (IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
@@ -14,20 +18,38 @@ from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
                             RecipeIngredient, ShoppingCart, Tag)
 from users.models import Subscription
+from .cache import (get_cached_recipe_list, get_ingredient_suggestions,
+                    get_recipe_version_names, get_shopping_list,
+                    get_shopping_list_file, versioned_condition)
+from .constants import (SHOPPING_LIST_CONTENT_TYPES,
+                        SHOPPING_LIST_DEFAULT_FORMAT)
 from .filters import IngredientFilter, RecipeFilter
-from .mixins import UserRelatedModelMixin
+from .mixins import CursorPaginationMixin, UserRelatedModelMixin
+from .negotiation import IgnoreClientContentNegotiation
+from .paginators import (PageNumberPagination, RecipeCursorPagination,
+                         UserCursorPagination)
 from .permissions import IsOwnerOrReadOnly
 from .serializers import (AvatarSerializer, FavoriteRecipeSerializer,
                           IngredientSerializer, RecipeCreateSerializer,
-                          RecipeReadSerializer, ShoppingCartSerialiser,
-                          ShortLinkSerializer, ShortRecipeSerializer,
-                          SubscriptionReadSerializer, SubscriptionSerializer,
-                          TagSerializer)
-from .utils import create_short_link, get_pdf_shopping_list
+                          RecipeMatchSerializer, RecipeReadSerializer,
+                          ShoppingCartSerialiser, ShortLinkSerializer,
+                          ShortRecipeSerializer, SubscriptionReadSerializer,
+                          SubscriptionSerializer, TagSerializer)
+from .utils import (SHOPPING_LIST_EXPORTERS, create_short_link,
+                    get_ingredient_ids, get_recipes_for_read,
+                    get_recipes_limit)
 
 User = get_user_model()
 
 
+ingredients_condition = versioned_condition(
+    lambda request, **kwargs: ["ingredients"]
+)
+tags_condition = versioned_condition(lambda request, **kwargs: ["tags"])
+
+
+@method_decorator(ingredients_condition, name="list")
+@method_decorator(ingredients_condition, name="retrieve")
 class IngredientViewSet(ReadOnlyModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
@@ -35,23 +57,47 @@ class IngredientViewSet(ReadOnlyModelViewSet):
     serializer_class = IngredientSerializer
     queryset = Ingredient.objects.all()
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get("name", "").strip().lower()
+        if not name:
+            return super().list(request, *args, **kwargs)
+        return Response(get_ingredient_suggestions(name))
+
 
+@method_decorator(tags_condition, name="list")
+@method_decorator(tags_condition, name="retrieve")
 class TagViewSet(ReadOnlyModelViewSet):
     pagination_class = None
     serializer_class = TagSerializer
     queryset = Tag.objects.all()
 
 
-class RecipeViewSet(ModelViewSet):
+@method_decorator(
+    versioned_condition(get_recipe_version_names), name="retrieve"
+)
+@method_decorator(vary_on_headers("Authorization"), name="retrieve")
+class RecipeViewSet(CursorPaginationMixin, ModelViewSet):
+    cursor_pagination_class = RecipeCursorPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     permission_classes = [IsOwnerOrReadOnly, IsAuthenticatedOrReadOnly]
     serializer_class = RecipeCreateSerializer
-    queryset = Recipe.objects.all().prefetch_related(
-        "is_favorited", "in_shopping_cart"
-    )
+    queryset = Recipe.objects.all()
     http_method_names = ["get", "post", "patch", "delete"]
 
+    def get_queryset(self):
+        return get_recipes_for_read(
+            super().get_queryset(), self.request.user
+        )
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        get_page = super().list
+        return Response(get_cached_recipe_list(
+            request, lambda: get_page(request, *args, **kwargs).data
+        ))
+
     def get_serializer_class(self):
         if self.action == "favorite" or self.action == "shopping_cart":
             return ShortRecipeSerializer
@@ -66,24 +112,93 @@ class RecipeViewSet(ModelViewSet):
         kwargs["partial"] = False
         return self.update(request, *args, **kwargs)
 
+    @action(["get"], detail=False, permission_classes=[IsAuthenticated])
+    def feed(self, request):
+        """Recipes of authors the user is subscribed to, newest first."""
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            author__subscribing__user=request.user
+        )
+        paginator = RecipeCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(["get"], detail=False)
+    def by_ingredients(self, request):
+        """Recipes with given ingredients, ranked by the share
+        of recipe ingredients found among them."""
+        ingredient_ids = get_ingredient_ids(request)
+        recipes = self.filter_queryset(Recipe.objects.all()).filter(
+            recipeingredient__ingredient__in=ingredient_ids
+        )
+        ranking = (
+            RecipeIngredient.objects
+            .filter(recipe__in=recipes.values("id"))
+            .values("recipe_id")
+            .annotate(
+                matched=Count(
+                    "id", filter=Q(ingredient__in=ingredient_ids)
+                ),
+                total=Count("id"),
+            )
+            .order_by(
+                (Cast("matched", FloatField()) / F("total")).desc(),
+                "-matched",
+                "recipe_id",
+            )
+        )
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(ranking, request, view=self)
+        recipes = self.get_queryset().in_bulk(
+            [row["recipe_id"] for row in page]
+        )
+        matches = []
+        for row in page:
+            # Recipe may be deleted after the ranking query.
+            recipe = recipes.get(row["recipe_id"])
+            if recipe is None:
+                continue
+            recipe.matched_ingredients = row["matched"]
+            recipe.total_ingredients = row["total"]
+            matches.append(recipe)
+        serializer = RecipeMatchSerializer(
+            matches,
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return paginator.get_paginated_response(serializer.data)
+
     @action(methods=["get"], detail=True, url_path="get-link")
     def get_link(self, request, pk):
         short_link = create_short_link(request, pk)
         serializer = ShortLinkSerializer(short_link)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-    @action(["get"], detail=False, permission_classes=[IsAuthenticated])
+    @action(
+        ["get"],
+        detail=False,
+        permission_classes=[IsAuthenticated],
+        content_negotiation_class=IgnoreClientContentNegotiation
+    )
     def download_shopping_cart(self, request):
-        ingredients_amounts = (
-            RecipeIngredient.objects.filter(
-                recipe__is_in_shopping_cart__user=request.user
+        file_format = request.query_params.get(
+            "format", SHOPPING_LIST_DEFAULT_FORMAT
+        )
+        if file_format not in SHOPPING_LIST_EXPORTERS:
+            raise ParseError(
+                "Неподдерживаемый формат. Доступные форматы: {}.".format(
+                    ", ".join(SHOPPING_LIST_EXPORTERS)
+                )
             )
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(Sum("amount"))
+        file = get_shopping_list_file(
+            get_shopping_list(request.user), file_format
         )
-        file = get_pdf_shopping_list(ingredients_amounts)
         return FileResponse(
-            file, as_attachment=True, filename="shopping_list.pdf")
+            file,
+            as_attachment=True,
+            filename=f"shopping_list.{file_format}",
+            content_type=SHOPPING_LIST_CONTENT_TYPES[file_format],
+        )
 
 
 class FavoriteRecipeViewSet(UserRelatedModelMixin):
@@ -107,7 +222,9 @@ class SubscriptionViewSet(UserRelatedModelMixin):
     related_object_field_name = "subscribing"
 
 
-class UsersViewSet(BaseUserViewSet):
+class UsersViewSet(CursorPaginationMixin, BaseUserViewSet):
+    cursor_pagination_class = UserCursorPagination
+    cursor_pagination_actions = ("subscriptions",)
 
     def get_serializer_class(self):
         if self.action == "avatar":
@@ -139,5 +256,14 @@ class UsersViewSet(BaseUserViewSet):
 
     @action(["get"], detail=False, permission_classes=(IsAuthenticated,))
     def subscriptions(self, request):
-        self.queryset = User.objects.filter(subscribing__user=request.user)
+        # Sliced prefetch selects top recipes of all authors on the page
+        # with one window function query.
+        recipes = Recipe.objects.all()[:get_recipes_limit(request)]
+        self.queryset = User.objects.filter(
+            subscribing__user=request.user
+        ).annotate(
+            is_subscribed=Value(True)
+        ).prefetch_related(
+            Prefetch("recipes", queryset=recipes, to_attr="recipes_preview")
+        )
         return self.list(request)
@@ -27,6 +27,10 @@ DEBUG = os.getenv('DEBUG', 'False') == 'True'
 
 ALLOWED_HOSTS = os.getenv('DJANGO_ALLOWED_HOSTS', '').split()
 
+# Async views of the most read endpoints are served in ASGI mode only,
+# under WSGI every async view would run its own event loop.
+ASYNC_VIEWS = os.getenv('SERVER_MODE', 'wsgi') == 'asgi'
+
 
 # Application definition
 
@@ -99,6 +103,19 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -141,6 +158,9 @@ FONTS_DIR = BASE_DIR / 'static_dev/fonts/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploaded files larger than this are streamed to temporary files on disk
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
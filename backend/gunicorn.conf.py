@@ -0,0 +1,112 @@
+"""Gunicorn configuration of the backend.
+
+Workers and threads are sized from the CPU count,
+every value can be overridden with GUNICORN_* environment variables.
+SERVER_MODE selects WSGI (sync or threaded workers) or ASGI (uvicorn workers).
+Without shared cache (CACHE_BACKEND) only one worker is started.
+"""
+import multiprocessing
+import os
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram_backend.settings')
+
+cpu_count = multiprocessing.cpu_count()
+asgi = os.getenv('SERVER_MODE', 'wsgi') == 'asgi'
+# Local memory cache is private to each process, so invalidations of cached
+# shopping lists, data versions and recipe pages would not reach other workers.
+local_cache = settings.CACHES['default']['BACKEND'] == (
+    'django.core.cache.backends.locmem.LocMemCache'
+)
+
+
+def get_workers(default):
+    if 'GUNICORN_WORKERS' not in os.environ:
+        return 1 if local_cache else default
+    workers = int(os.environ['GUNICORN_WORKERS'])
+    if workers > 1 and local_cache:
+        raise ImproperlyConfigured(
+            'Several workers need shared cache, set CACHE_BACKEND '
+            'and CACHE_LOCATION or GUNICORN_WORKERS=1.'
+        )
+    return workers
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+proc_name = 'foodgram'
+
+if asgi:
+    wsgi_app = 'foodgram_backend.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    # One event loop per CPU serves many connections.
+    workers = get_workers(cpu_count)
+    threads = 1
+else:
+    wsgi_app = 'foodgram_backend.wsgi:application'
+    workers = get_workers(cpu_count * 2 + 1)
+    threads = int(os.getenv('GUNICORN_THREADS', 2))
+    worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Django, DRF and fonts are loaded once in master and shared by workers.
+preload_app = True
+
+# Workers are restarted after a number of requests to bound memory growth,
+# jitter keeps them from restarting all at once.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG')
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+# Gunicorn metrics (requests, duration, workers) are sent to StatsD if set.
+statsd_host = os.getenv('GUNICORN_STATSD_HOST')
+statsd_prefix = 'foodgram'
+
+slow_request_time = float(os.getenv('GUNICORN_SLOW_REQUEST_TIME', 1))
+
+
+def when_ready(server):
+    server.log.info(
+        'Serving %s with %s %s workers, %s threads each',
+        server.app.cfg.wsgi_app, server.app.cfg.workers,
+        server.app.cfg.worker_class_str, server.app.cfg.threads
+    )
+
+
+def post_fork(server, worker):
+    worker.requests_count = 0
+    worker.requests_time = 0.0
+    worker.requests_lock = Lock()
+
+
+def pre_request(worker, req):
+    """Called by sync and threaded workers only, not by uvicorn ones."""
+    req.start_time = monotonic()
+
+
+def post_request(worker, req, environ, resp):
+    duration = monotonic() - req.start_time
+    with worker.requests_lock:
+        worker.requests_count += 1
+        worker.requests_time += duration
+    if duration >= slow_request_time:
+        worker.log.warning(
+            'Slow request %s %s: %.3f s', req.method, req.path, duration
+        )
+
+
+def worker_exit(server, worker):
+    count = getattr(worker, 'requests_count', 0)
+    if count:
+        server.log.info(
+            'Worker %s served %s requests, %.1f ms on average',
+            worker.pid, count, worker.requests_time / count * 1000
+        )
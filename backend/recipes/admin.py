@@ -35,7 +35,7 @@ class TagInline(admin.TabularInline):
 
 
 class RecipeAdmin(admin.ModelAdmin):
-    readonly_fields = ('favorite_count',)
+    readonly_fields = ('favorites_count',)
     list_display = ('name', 'author')
     list_display_links = ('name', 'author')
     list_select_related = ('author',)
@@ -43,10 +43,6 @@ class RecipeAdmin(admin.ModelAdmin):
     list_filter = ('tags',)
     inlines = (IngredientInline, TagInline)
 
-    @admin.display(description='Количество добавлений в избраное')
-    def favorite_count(self, obj):
-        return obj.is_favorited.count()
-
 
 class TagAdmin(admin.ModelAdmin):
     list_display = ('name', 'slug')
@@ -1,8 +1,16 @@
+CHECKSUM_LENGTH = 64
+FILE_NAME_LENGTH = 256
+IMAGE_MEDIUM_SIZE = (800, 800)
+IMAGE_THUMBNAIL_SIZE = (300, 300)
+IMAGE_VARIANT_FORMAT = 'WEBP'
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_WORKERS = 2
 INGREDIENT_NAME_LENGTH = 128
 MIN_IGNREDIENT_AMOUNT = 1
 MAX_COOKING_TIME = 1600
 MIN_COOKING_TIME = 1
 RECIPE_NAME_LENGTH = 256
+SEARCH_CONFIG = 'russian'
 TAG_NAME_LENGTH = 32
 TAG_SLUG_LENGTH = 32
 UNIT_NAME_LENGTH = 64
@@ -0,0 +1,129 @@
+"""Resized variants of uploaded images.
+
+Models list their variants in `image_variants` attribute as
+{variant field: (source image field, max size)}. Variants are made
+in a thread pool after the source image is saved; until then
+get_image_variant() returns the source image."""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from .constants import (IMAGE_VARIANT_FORMAT, IMAGE_VARIANT_QUALITY,
+                        IMAGE_WORKERS)
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    # Created on first use, so it is not shared by forked server workers.
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=IMAGE_WORKERS, thread_name_prefix='image_variants'
+        )
+    return _executor
+
+
+def get_variant_base_name(instance, variant) -> str:
+    source_field, _ = instance.image_variants[variant]
+    source_name = os.path.basename(getattr(instance, source_field).name)
+    return (f'{os.path.splitext(source_name)[0]}_{variant}.'
+            f'{IMAGE_VARIANT_FORMAT.lower()}')
+
+
+def is_variant_current(instance, variant) -> bool:
+    """Check variant is made from the current source image.
+    Storage may add a suffix to the variant name, so prefix is compared."""
+    source_field, _ = instance.image_variants[variant]
+    variant_file = getattr(instance, variant)
+    if not getattr(instance, source_field) or not variant_file:
+        return False
+    expected_name = instance._meta.get_field(variant).generate_filename(
+        instance, get_variant_base_name(instance, variant)
+    )
+    return variant_file.name.startswith(os.path.splitext(expected_name)[0])
+
+
+def get_image_variant(instance, variant):
+    """Return variant file if it is made, source image file otherwise."""
+    if is_variant_current(instance, variant):
+        return getattr(instance, variant)
+    source_field, _ = instance.image_variants[variant]
+    return getattr(instance, source_field)
+
+
+def get_stale_variants(instance) -> list:
+    return [
+        variant for variant, (source_field, _) in
+        instance.image_variants.items()
+        if getattr(instance, source_field)
+        and not is_variant_current(instance, variant)
+    ]
+
+
+def resize_image(file, size) -> bytes:
+    with file.open('rb'), Image.open(file) as image:
+        # Lets JPEG decoder skip pixels not needed for the variant.
+        image.draft('RGB', size)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if image.has_transparency_data
+                                  else 'RGB')
+        content = BytesIO()
+        image.save(
+            content, IMAGE_VARIANT_FORMAT, quality=IMAGE_VARIANT_QUALITY
+        )
+    return content.getvalue()
+
+
+def save_image_variants(model, pk):
+    """Make stale image variants of the object and save them,
+    deleting files of the variants they replace."""
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    variants = get_stale_variants(instance)
+    old_files = []
+    for variant in variants:
+        source_field, size = model.image_variants[variant]
+        variant_file = getattr(instance, variant)
+        if variant_file:
+            old_files.append((variant_file.storage, variant_file.name))
+        variant_file.save(
+            get_variant_base_name(instance, variant),
+            ContentFile(resize_image(getattr(instance, source_field), size)),
+            save=False
+        )
+    if variants:
+        instance.save(update_fields=variants)
+    for storage, name in old_files:
+        storage.delete(name)
+
+
+def run_save_image_variants(model, pk):
+    try:
+        save_image_variants(model, pk)
+    except Exception:
+        logger.exception(
+            'Image variants of %s %s are not made', model.__name__, pk
+        )
+    finally:
+        connections.close_all()
+
+
+def schedule_image_variants(instance):
+    """Make stale image variants of the object in background,
+    after the transaction saving its source image is committed."""
+    if get_stale_variants(instance):
+        model, pk = type(instance), instance.pk
+        transaction.on_commit(
+            lambda: get_executor().submit(run_save_image_variants, model, pk)
+        )
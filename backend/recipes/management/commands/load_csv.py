@@ -1,17 +1,54 @@
 import csv
+import hashlib
+import json
+from itertools import islice
+from time import perf_counter
 
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist, ValidationError
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.db.utils import IntegrityError
 
+from recipes.models import ImportedFile
+
 
 class Command(BaseCommand):
-    help = 'Load CSV file to DataBase'
+    help = 'Load CSV, JSON or NDJSON file to DataBase'
     LOOKUP_APP_NAME = 'recipes'
+    BATCH_SIZE = 1000
+    READ_CHUNK_SIZE = 64 * 1024
+    FILE_READERS = {
+        'csv': 'read_csv',
+        'json': 'read_json',
+        'ndjson': 'read_ndjson',
+        'jsonl': 'read_ndjson',
+    }
 
     def add_arguments(self, parser) -> None:
-        parser.add_argument('csv_file', type=str, help='File with path')
+        parser.add_argument(
+            'csv_file',
+            type=str,
+            help='File with path. Format is taken from the file extension: '
+                 + ', '.join(self.FILE_READERS)
+        )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Insert objects in batches, skipping existing ones'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=self.BATCH_SIZE,
+            help=f'Objects per batch in bulk mode (default {self.BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Load the file even if it was already loaded unchanged'
+        )
 
     def get_model_by_name(self, name):
         if '_' in name:
@@ -32,36 +69,162 @@ class Command(BaseCommand):
             'Check model name.'
         )
 
+    def get_checksum(self, file_path):
+        checksum = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            while chunk := file.read(self.READ_CHUNK_SIZE):
+                checksum.update(chunk)
+        return checksum.hexdigest()
+
+    def read_csv(self, file):
+        return csv.DictReader(file)
+
+    def read_json(self, file):
+        """Yield objects of JSON array one by one,
+        reading the file by chunks."""
+        decoder = json.JSONDecoder()
+        buffer = file.read(self.READ_CHUNK_SIZE).lstrip()
+        if not buffer.startswith('['):
+            raise CommandError('JSON file should contain an array of objects.')
+        buffer = buffer[1:]
+        while True:
+            buffer = buffer.lstrip()
+            if buffer.startswith(']'):
+                return
+            if buffer.startswith(','):
+                buffer = buffer[1:]
+                continue
+            try:
+                row, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                # Object may be cut by the end of the chunk.
+                chunk = file.read(self.READ_CHUNK_SIZE)
+                if not chunk:
+                    raise
+                buffer += chunk
+                continue
+            yield row
+            buffer = buffer[end:]
+
+    def read_ndjson(self, file):
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+    def read_rows(self, file, file_format):
+        """Yield rows of the file as dicts and count them."""
+        reader = getattr(self, self.FILE_READERS[file_format])
+        self.rows_count = 0
+        for row in reader(file):
+            if not isinstance(row, dict):
+                raise CommandError(f'Row {row} is not an object.')
+            self.rows_count += 1
+            yield row
+
+    def load(self, model, rows):
+        """Create objects one by one, warning about existing ones."""
+        count = 0
+        for row in rows:
+            try:
+                _, created = model.objects.get_or_create(**row)
+                if created:
+                    count += 1
+                else:
+                    self.stdout.write(self.style.WARNING(
+                        f'Object with fields {row} already exist. '
+                        'Object creation Skipped'
+                    ))
+            except IntegrityError:
+                raise CommandError(
+                    f'Can not create object {row}. '
+                    'Objects with partially matching values already exist '
+                    'in DataBase.\nUNIQUE constraint violated.'
+                )
+            except ValueError as err:
+                raise CommandError(
+                    f'{err}\nPlease check fields names in CSV file. '
+                    'Field name for Related Fields should end in `_id`.'
+                )
+        return count
+
+    def get_new_objects(self, model, rows, seen):
+        """Return objects for rows, which are not in DataBase
+        and not seen in previous batches. Uses one query per batch."""
+        fields = list(rows[0])
+        try:
+            keys = [
+                tuple(
+                    model._meta.get_field(field).to_python(row[field])
+                    for field in fields
+                ) for row in rows
+            ]
+            existing = set(model.objects.filter(**{
+                f'{fields[0]}__in': {key[0] for key in keys}
+            }).values_list(*fields))
+            objects = []
+            for key, row in zip(keys, rows):
+                if key not in existing and key not in seen:
+                    seen.add(key)
+                    objects.append(model(**row))
+        except (FieldDoesNotExist, TypeError, ValueError,
+                ValidationError) as err:
+            raise CommandError(
+                f'{err}\nPlease check fields names and values in CSV file. '
+                'Field name for Related Fields should end in `_id`.'
+            )
+        return objects
+
+    def bulk_load(self, model, rows, batch_size):
+        """Create objects in batches inside one transaction.
+        Objects violating UNIQUE constraints are skipped."""
+        count = 0
+        seen = set()
+        with transaction.atomic():
+            while batch := list(islice(rows, batch_size)):
+                objects = self.get_new_objects(model, batch, seen)
+                model.objects.bulk_create(objects, ignore_conflicts=True)
+                count += len(objects)
+        return count
+
     def handle(self, *args, **options):
         file_path = options['csv_file']
         file_name = file_path.split('/')[-1]
-        model_name = file_name.split('.')[0]
+        model_name, _, file_format = file_name.partition('.')
         model = self.get_model_by_name(model_name)
+        if file_format not in self.FILE_READERS:
+            raise CommandError(
+                f'Unsupported file format {file_format}. '
+                f'Supported formats: {", ".join(self.FILE_READERS)}.'
+            )
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size should be positive.')
+        start = perf_counter()
+        checksum = self.get_checksum(file_path)
+        if (not options['force'] and ImportedFile.objects.filter(
+                file_name=file_name, checksum=checksum).exists()):
+            self.stdout.write(self.style.SUCCESS(
+                f'{file_name} is already loaded and not changed. '
+                'Loading skipped.'
+            ))
+            return
         with open(file_path, encoding='utf=8') as file:
-            reader = csv.DictReader(file)
-            count = 0
-            for row in reader:
-                try:
-                    _, created = model.objects.get_or_create(**row)
-                    if created:
-                        count += 1
-                    else:
-                        self.stdout.write(self.style.WARNING(
-                            f'Object with fields {row} already exist. '
-                            'Object creation Skipped'
-                        ))
-                except IntegrityError:
-                    raise CommandError(
-                        f'Can not create object {row}. '
-                        'Objects with partially matching values already exist '
-                        'in DataBase.\nUNIQUE constraint violated.'
-                    )
-                except ValueError as err:
-                    raise CommandError(
-                        f'{err}\nPlease check fields names in CSV file. '
-                        'Field name for Related Fields should end in `_id`.'
-                    )
+            rows = self.read_rows(file, file_format)
+            try:
+                if options['bulk']:
+                    count = self.bulk_load(
+                        model, rows, options['batch_size'])
+                else:
+                    count = self.load(model, rows)
+            except json.JSONDecodeError as err:
+                raise CommandError(f'Invalid JSON in {file_name}: {err}')
+        ImportedFile.objects.update_or_create(
+            file_name=file_name, defaults={'checksum': checksum}
+        )
+        rows = self.rows_count
+        elapsed = perf_counter() - start
         self.stdout.write(self.style.SUCCESS(
             f'Successfully load {file_name}.\n'
-            f'{count} objects added to {model.__name__} model.'
+            f'{count} objects added to {model.__name__} model.\n'
+            f'{rows} rows processed in {elapsed:.2f} s '
+            f'({rows / elapsed:.0f} rows/sec).'
         ))
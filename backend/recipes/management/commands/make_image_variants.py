@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from recipes.images import get_stale_variants, save_image_variants
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Make missing resized variants of recipe images and avatars'
+
+    def handle(self, *args, **options):
+        for model in (Recipe, User):
+            made = 0
+            for instance in model.objects.iterator():
+                if not get_stale_variants(instance):
+                    continue
+                try:
+                    save_image_variants(model, instance.pk)
+                except Exception as error:
+                    self.stderr.write(f'{instance}: {error}')
+                else:
+                    made += 1
+            self.stdout.write(self.style.SUCCESS(
+                f'Image variants made for {made} '
+                f'{model._meta.verbose_name_plural}.'
+            ))
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import FavoriteRecipe, Recipe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount favorites count of recipes and recipes count of users, '
+        'fixing drift after bulk operations, which do not update counters'
+    )
+
+    def count_subquery(self, model, field):
+        return Coalesce(Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .values(field).annotate(count=Count('pk')).values('count')
+        ), 0)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            recipes = Recipe.objects.update(
+                favorites_count=self.count_subquery(FavoriteRecipe, 'recipe'))
+            users = User.objects.update(
+                recipes_count=self.count_subquery(Recipe, 'author'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Counters recounted for {recipes} recipes and {users} users.'
+        ))
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_alter_recipe_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=256, unique=True, verbose_name='Имя файла')),
+                ('checksum', models.CharField(max_length=64, verbose_name='Контрольная сумма')),
+                ('imported_at', models.DateTimeField(auto_now=True, verbose_name='Дата загрузки')),
+            ],
+            options={
+                'verbose_name': 'загруженный файл',
+                'verbose_name_plural': 'Загруженные файлы',
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+INDEXES = {
+    'recipes_ingredient_upper_name_idx': (
+        'ON recipes_ingredient (UPPER(name) text_pattern_ops)'
+    ),
+    'recipes_ingredient_upper_name_trgm_idx': (
+        'ON recipes_ingredient USING gin (UPPER(name) gin_trgm_ops)'
+    ),
+}
+
+
+def create_indexes(apps, schema_editor):
+    # Indexes for case insensitive prefix and substring search,
+    # available on PostgreSQL only.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, definition in INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} {definition}')
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_importedfile'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
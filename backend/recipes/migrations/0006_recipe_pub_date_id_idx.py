@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_ingredient_name_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-pub_date', 'id'], name='recipe_pub_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')})
+        .values(field).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+def recount_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    FavoriteRecipe = apps.get_model('recipes', 'FavoriteRecipe')
+    User = apps.get_model('users', 'User')
+    Recipe.objects.update(
+        favorites_count=count_subquery(FavoriteRecipe, 'recipe'))
+    User.objects.update(recipes_count=count_subquery(Recipe, 'author'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_pub_date_id_idx'),
+        ('users', '0003_user_recipes_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Количество добавлений в избранное'),
+        ),
+        migrations.RunPython(recount_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_favorites_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date', 'id'], name='recipe_author_pub_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_author_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_medium',
+            field=models.ImageField(blank=True, editable=False, upload_to='recipes/images/variants/', verbose_name='Уменьшенная картинка'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='recipes/images/variants/', verbose_name='Миниатюра картинки'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:37
+
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+INDEX_NAME = 'recipes_recipe_search_vector_idx'
+SEARCH_CONFIG = 'russian'
+
+
+def get_search_vector(RecipeIngredient):
+    # Copy of recipes.search.get_search_vector at the time of migration.
+    ingredient_names = Subquery(
+        RecipeIngredient.objects.filter(recipe=OuterRef('pk'))
+        .values('recipe')
+        .annotate(names=StringAgg('ingredient__name', ' '))
+        .values('names')
+    )
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+        + SearchVector(ingredient_names, weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def fill_search_vectors(apps, schema_editor):
+    # Full-text search is available on PostgreSQL only.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    Recipe.objects.update(search_vector=get_search_vector(RecipeIngredient))
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} '
+        'ON recipes_recipe USING gin (search_vector)'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(fill_search_vectors, drop_search_index),
+    ]
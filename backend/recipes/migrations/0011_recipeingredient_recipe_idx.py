@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipeingredient',
+            index=models.Index(fields=['recipe', 'ingredient'], name='recipe_ingredient_recipe_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipeingredient_recipe_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipetag',
+            index=models.Index(fields=['recipe', 'tag'], name='recipe_tag_recipe_idx'),
+        ),
+    ]
@@ -1,11 +1,15 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
-from .constants import (INGREDIENT_NAME_LENGTH, MAX_COOKING_TIME,
-                        MIN_COOKING_TIME, MIN_IGNREDIENT_AMOUNT,
-                        RECIPE_NAME_LENGTH, TAG_NAME_LENGTH, TAG_SLUG_LENGTH,
-                        UNIT_NAME_LENGTH)
+# Recipes depend on users app anyway, so its save mixin is shared.
+from users.models import PartialSaveModelMixin
+from .constants import (CHECKSUM_LENGTH, FILE_NAME_LENGTH, IMAGE_MEDIUM_SIZE,
+                        IMAGE_THUMBNAIL_SIZE, INGREDIENT_NAME_LENGTH,
+                        MAX_COOKING_TIME, MIN_COOKING_TIME,
+                        MIN_IGNREDIENT_AMOUNT, RECIPE_NAME_LENGTH,
+                        TAG_NAME_LENGTH, TAG_SLUG_LENGTH, UNIT_NAME_LENGTH)
 
 User = get_user_model()
 
@@ -40,12 +44,24 @@ class Tag(models.Model):
         return f'{self.name}'
 
 
-class Recipe(models.Model):
+class RecipeManager(models.Manager):
+    def get_queryset(self):
+        # Search vector is only used in database queries.
+        return super().get_queryset().defer('search_vector')
+
+
+class Recipe(PartialSaveModelMixin, models.Model):
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, verbose_name='Автор')
     name = models.CharField('Haзвание', max_length=RECIPE_NAME_LENGTH)
     image = models.ImageField(
         'Картинка', upload_to='recipes/images/')
+    image_thumbnail = models.ImageField(
+        'Миниатюра картинки', upload_to='recipes/images/variants/',
+        blank=True, editable=False)
+    image_medium = models.ImageField(
+        'Уменьшенная картинка', upload_to='recipes/images/variants/',
+        blank=True, editable=False)
     text = models.TextField(verbose_name='Описание')
     ingredients = models.ManyToManyField(
         Ingredient, through='RecipeIngredient', verbose_name='Ингредиенты')
@@ -68,12 +84,37 @@ class Recipe(models.Model):
     )
     pub_date = models.DateTimeField(
         'Дата публикации', auto_now_add=True)
+    search_vector = SearchVectorField(
+        'Поисковый вектор', null=True, editable=False)
+    favorites_count = models.PositiveIntegerField(
+        'Количество добавлений в избранное',
+        default=0,
+        editable=False,
+        db_index=True
+    )
+
+    objects = RecipeManager()
+
+    counter_fields = ('favorites_count',)
+    # Resized copies of image, made in background by recipes.images.
+    image_variants = {
+        'image_thumbnail': ('image', IMAGE_THUMBNAIL_SIZE),
+        'image_medium': ('image', IMAGE_MEDIUM_SIZE),
+    }
 
     class Meta:
         verbose_name = 'рецепт'
         verbose_name_plural = 'Рецепты'
         default_related_name = 'recipes'
         ordering = ['-pub_date', 'id']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', 'id'], name='recipe_pub_date_id_idx'),
+            models.Index(
+                fields=['author', '-pub_date', 'id'],
+                name='recipe_author_pub_date_id_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.name}'
@@ -92,6 +133,11 @@ class RecipeTag(models.Model):
             models.UniqueConstraint(
                 fields=['tag', 'recipe'], name='unique_tag_for_recipe'),
         ]
+        # Tags of recipe are checked by tag filter reading index only.
+        indexes = [
+            models.Index(
+                fields=['recipe', 'tag'], name='recipe_tag_recipe_idx'),
+        ]
 
     def __str__(self):
         return f'{self.recipe.name}, {self.tag.name}'
@@ -122,6 +168,14 @@ class RecipeIngredient(models.Model):
                 name='unique_ingredient_in_recipe'
             )
         ]
+        # With the unique constraint index, recipes are found by ingredients
+        # and their ingredients are counted reading indexes only.
+        indexes = [
+            models.Index(
+                fields=['recipe', 'ingredient'],
+                name='recipe_ingredient_recipe_idx'
+            ),
+        ]
 
     def __str__(self):
         return (
@@ -174,3 +228,18 @@ class ShoppingCart(models.Model):
             f'"{self.recipe.name}" в списке покупок '
             f'пользователя {self.user}'
         )
+
+
+class ImportedFile(models.Model):
+    file_name = models.CharField(
+        'Имя файла', max_length=FILE_NAME_LENGTH, unique=True)
+    checksum = models.CharField(
+        'Контрольная сумма', max_length=CHECKSUM_LENGTH)
+    imported_at = models.DateTimeField('Дата загрузки', auto_now=True)
+
+    class Meta:
+        verbose_name = 'загруженный файл'
+        verbose_name_plural = 'Загруженные файлы'
+
+    def __str__(self):
+        return f'{self.file_name} ({self.checksum})'
@@ -0,0 +1,38 @@
+"""Full-text search vectors of recipes, available on PostgreSQL only."""
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+
+from .constants import SEARCH_CONFIG
+from .models import Recipe, RecipeIngredient
+
+
+def get_search_vector(recipe_ingredient_model):
+    """Vector of recipe name, text and ingredient names,
+    weighted in this order."""
+    ingredient_names = Subquery(
+        recipe_ingredient_model.objects.filter(recipe=OuterRef('pk'))
+        .values('recipe')
+        .annotate(names=StringAgg('ingredient__name', ' '))
+        .values('names')
+    )
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+        + SearchVector(ingredient_names, weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(recipe_ids):
+    """Update search vectors of recipes after the transaction is committed,
+    when their ingredients, saved with bulk operations, are saved too."""
+    if connection.vendor != 'postgresql':
+        return
+    ids = list(recipe_ids)
+    if ids:
+        transaction.on_commit(
+            lambda: Recipe.objects.filter(id__in=ids).update(
+                search_vector=get_search_vector(RecipeIngredient)
+            )
+        )
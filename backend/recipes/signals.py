@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .images import schedule_image_variants
+from .models import FavoriteRecipe, Ingredient, Recipe, RecipeIngredient
+from .search import update_search_vectors
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=FavoriteRecipe)
+def increase_favorites_count(sender, instance, created, **kwargs):
+    if created:
+        Recipe.objects.filter(id=instance.recipe_id).update(
+            favorites_count=F('favorites_count') + 1)
+
+
+# Counters drift from bulk operations, which send no signals,
+# are fixed with recount_counters command. Decrements stop at zero,
+# so drifted counters do not make deletes fail.
+@receiver(post_delete, sender=FavoriteRecipe)
+def decrease_favorites_count(sender, instance, **kwargs):
+    Recipe.objects.filter(id=instance.recipe_id).update(
+        favorites_count=Greatest(F('favorites_count') - 1, 0))
+
+
+@receiver(post_save, sender=Recipe)
+def increase_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        User.objects.filter(id=instance.author_id).update(
+            recipes_count=F('recipes_count') + 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrease_recipes_count(sender, instance, **kwargs):
+    User.objects.filter(id=instance.author_id).update(
+        recipes_count=Greatest(F('recipes_count') - 1, 0))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def make_image_variants(sender, instance, **kwargs):
+    schedule_image_variants(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(sender, instance, update_fields=None,
+                                **kwargs):
+    # Saving only image variants or counters does not change searched text.
+    if update_fields is None or {'name', 'text'} & set(update_fields):
+        update_search_vectors([instance.id])
+
+
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+def update_search_vector_by_ingredients(sender, instance, **kwargs):
+    update_search_vectors([instance.recipe_id])
+
+
+@receiver(post_save, sender=Ingredient)
+def update_search_vectors_by_ingredient(sender, instance, created, **kwargs):
+    if not created:
+        update_search_vectors(
+            RecipeIngredient.objects.filter(ingredient=instance)
+            .values_list('recipe_id', flat=True)
+        )
@@ -2,4 +2,10 @@ from django.contrib import admin
 
 from .models import ShortLink
 
-admin.site.register(ShortLink)
+
+@admin.register(ShortLink)
+class ShortLinkAdmin(admin.ModelAdmin):
+    list_display = ('short_link_slug', 'redirect_url', 'clicks')
+    search_fields = ('short_link_slug', 'redirect_url')
+    readonly_fields = ('clicks',)
+    ordering = ('-clicks',)
@@ -0,0 +1,71 @@
+import atexit
+import logging
+from collections import Counter, defaultdict
+from threading import Lock
+from time import monotonic
+
+from django.db import DatabaseError
+from django.db.models import F
+
+from .constants import CLICKS_FLUSH_INTERVAL, CLICKS_FLUSH_SIZE
+from .models import ShortLink
+
+logger = logging.getLogger(__name__)
+
+_clicks = Counter()
+_lock = Lock()
+_last_flush = monotonic()
+
+
+def _add_click(slug) -> bool:
+    """Count click in process buffer, return True if it should be flushed."""
+    with _lock:
+        _clicks[slug] += 1
+        return (len(_clicks) >= CLICKS_FLUSH_SIZE
+                or monotonic() - _last_flush >= CLICKS_FLUSH_INTERVAL)
+
+
+def _take_clicks() -> dict:
+    """Empty the buffer, return its slugs grouped by clicks count."""
+    global _clicks, _last_flush
+    with _lock:
+        clicks, _clicks = _clicks, Counter()
+        _last_flush = monotonic()
+    slugs_by_count = defaultdict(list)
+    for slug, count in clicks.items():
+        slugs_by_count[count].append(slug)
+    return slugs_by_count
+
+
+def record_click(slug):
+    """Count click, flushing buffer by interval or size.
+    Clicks failed to be written are lost, the redirect is still served."""
+    if _add_click(slug):
+        try:
+            flush_clicks()
+        except DatabaseError:
+            logger.exception('Short link clicks are not saved')
+
+
+async def arecord_click(slug):
+    if _add_click(slug):
+        try:
+            await aflush_clicks()
+        except DatabaseError:
+            logger.exception('Short link clicks are not saved')
+
+
+def flush_clicks():
+    """Write buffered clicks with one UPDATE per distinct clicks count."""
+    for count, slugs in _take_clicks().items():
+        ShortLink.objects.filter(short_link_slug__in=slugs).update(
+            clicks=F('clicks') + count)
+
+
+async def aflush_clicks():
+    for count, slugs in _take_clicks().items():
+        await ShortLink.objects.filter(short_link_slug__in=slugs).aupdate(
+            clicks=F('clicks') + count)
+
+
+atexit.register(flush_clicks)
@@ -1 +1,6 @@
 SHORT_LINK_LENGTH = 7
+SHORT_LINK_CREATE_ATTEMPTS = 10
+SHORT_LINK_CACHE_TIMEOUT = 60 * 60 * 24
+CLICKS_FLUSH_INTERVAL = 30
+CLICKS_FLUSH_SIZE = 500
+TOP_SHORT_LINKS_LIMIT = 10
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from shortlink.constants import CLICKS_FLUSH_INTERVAL, TOP_SHORT_LINKS_LIMIT
+from shortlink.models import ShortLink
+
+
+class Command(BaseCommand):
+    help = (
+        'Show most clicked short links. Server workers write clicks '
+        f'every {CLICKS_FLUSH_INTERVAL} seconds, so counts can lag by '
+        'that long per worker'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=TOP_SHORT_LINKS_LIMIT,
+            help='Number of links to show.'
+        )
+
+    def handle(self, *args, **options):
+        links = (ShortLink.objects
+                 .filter(clicks__gt=0)
+                 .order_by('-clicks', 'id')
+                 .values_list('clicks', 'short_link_url', 'redirect_url')
+                 [:options['limit']])
+        if not links:
+            self.stdout.write('No clicks recorded yet.')
+        for clicks, short_link_url, redirect_url in links:
+            self.stdout.write(
+                f'{clicks:>8} {short_link_url} -> {redirect_url}')
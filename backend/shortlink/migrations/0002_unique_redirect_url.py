@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+def make_redirect_urls_unique(apps, schema_editor):
+    """Keep earliest link per url, mark the rest with their own slug,
+    so already shared short links keep redirecting to the recipe."""
+    ShortLink = apps.get_model('shortlink', 'ShortLink')
+    seen = set()
+    duplicates = []
+    for link in ShortLink.objects.exclude(
+            redirect_url__isnull=True).order_by('id').iterator():
+        if link.redirect_url in seen:
+            link.redirect_url = f'{link.redirect_url}?s={link.short_link_slug}'
+            duplicates.append(link)
+        else:
+            seen.add(link.redirect_url)
+    ShortLink.objects.bulk_update(duplicates, ['redirect_url'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shortlink', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            make_redirect_urls_unique, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='shortlink',
+            name='redirect_url',
+            field=models.URLField(blank=True, null=True, unique=True, verbose_name='Оригинальная ссылка'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shortlink', '0002_unique_redirect_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shortlink',
+            name='clicks',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Переходы'),
+        ),
+    ]
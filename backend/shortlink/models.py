@@ -7,9 +7,11 @@ class ShortLink(models.Model):
     short_link_slug = models.CharField(
         'Слаг короткой ссылки', max_length=SHORT_LINK_LENGTH, unique=True)
     redirect_url = models.URLField(
-        'Оригинальная ссылка', null=True, blank=True)
+        'Оригинальная ссылка', null=True, blank=True, unique=True)
     short_link_url = models.URLField(
         'Короткая ссылка', null=True, blank=True)
+    clicks = models.PositiveIntegerField(
+        'Переходы', default=0, editable=False)
 
     class Meta:
         verbose_name = 'короткая ссылка'
@@ -0,0 +1,11 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ShortLink
+from .views import get_short_link_key
+
+
+@receiver([post_save, post_delete], sender=ShortLink)
+def clear_short_link_cache(sender, instance, **kwargs):
+    cache.delete(get_short_link_key(instance.short_link_slug))
@@ -1,7 +1,12 @@
+from django.conf import settings
 from django.urls import path
 
-from .views import short_link_redirect
+from .views import ashort_link_redirect, short_link_redirect
 
 urlpatterns = [
-    path('<slug:slug>/', short_link_redirect, name='short_link_redirect'),
+    path(
+        '<slug:slug>/',
+        ashort_link_redirect if settings.ASYNC_VIEWS else short_link_redirect,
+        name='short_link_redirect'
+    ),
 ]
@@ -1,8 +1,37 @@
+from django.core.cache import cache
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect
 
+from .clicks import arecord_click, record_click
+from .constants import SHORT_LINK_CACHE_TIMEOUT
 from .models import ShortLink
 
 
+def get_short_link_key(slug):
+    return f'short_link:{slug}'
+
+
 def short_link_redirect(request, slug):
-    link = get_object_or_404(ShortLink, short_link_slug=slug)
-    return redirect(link.redirect_url)
+    key = get_short_link_key(slug)
+    redirect_url = cache.get(key)
+    if redirect_url is None:
+        link = get_object_or_404(ShortLink, short_link_slug=slug)
+        redirect_url = link.redirect_url
+        cache.set(key, redirect_url, SHORT_LINK_CACHE_TIMEOUT)
+    record_click(slug)
+    return redirect(redirect_url)
+
+
+async def ashort_link_redirect(request, slug):
+    """Async version of short_link_redirect served in ASGI mode."""
+    key = get_short_link_key(slug)
+    redirect_url = await cache.aget(key)
+    if redirect_url is None:
+        try:
+            link = await ShortLink.objects.aget(short_link_slug=slug)
+        except ShortLink.DoesNotExist:
+            raise Http404
+        redirect_url = link.redirect_url
+        await cache.aset(key, redirect_url, SHORT_LINK_CACHE_TIMEOUT)
+    await arecord_click(slug)
+    return redirect(redirect_url)
@@ -1,2 +1,3 @@
+AVATAR_THUMBNAIL_SIZE = (150, 150)
 EMAIL_LENGTH = 256
 NAME_LENGTH = 150
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_recipes_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='users/variants/', verbose_name='Миниатюра аватара'),
+        ),
+    ]
@@ -2,19 +2,49 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.db.models import F, Q
 
-from .constants import EMAIL_LENGTH, NAME_LENGTH
+from .constants import AVATAR_THUMBNAIL_SIZE, EMAIL_LENGTH, NAME_LENGTH
 
 
-class User(AbstractUser):
+class PartialSaveModelMixin:
+    """Save existing objects without fields changed only outside
+    of ordinary saves, so a stale instance does not overwrite them:
+    counters, changed with F() expressions by signals,
+    and image variants, saved in background with update_fields.
+    Deferred fields are left out too, as Django does by default.
+    Used by models of users and recipes apps."""
+    counter_fields = ()
+    image_variants = {}
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred_fields = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.name not in self.image_variants
+                and field.attname not in deferred_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class User(PartialSaveModelMixin, AbstractUser):
     avatar = models.ImageField(
         'Аватар', upload_to='users/', null=True, default=None)
+    avatar_thumbnail = models.ImageField(
+        'Миниатюра аватара', upload_to='users/variants/',
+        blank=True, editable=False)
     first_name = models.CharField(
         'Имя', max_length=NAME_LENGTH, blank=False)
     last_name = models.CharField(
         'Фамилия', max_length=NAME_LENGTH, blank=False)
     email = models.EmailField(
         'Адрес электронной почты', max_length=EMAIL_LENGTH, unique=True)
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов', default=0, editable=False)
 
+    counter_fields = ('recipes_count',)
+    image_variants = {'avatar_thumbnail': ('avatar', AVATAR_THUMBNAIL_SIZE)}
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 